@@ -1,34 +1,164 @@
 import os
+import sys
 import json
-import yaml
+import importlib
+import contextlib
+import copy
 import datetime
+import functools
+import logging
 import typer
-from dotenv import load_dotenv
-from typing import Optional, List, Dict, Any, Tuple, Set
+from typing import Optional, List, Dict, Any, Tuple, Set, TYPE_CHECKING
 from pathlib import Path
-from tabulate import tabulate
-from sqlalchemy import inspect, text, MetaData
-from sqlalchemy.engine import Engine
 from collections import defaultdict, deque
 import uuid
 # Dynamic models import - will be loaded at runtime
-from src.planner import plan_migration
 from src.db import get_engine, init_metadata, MIGRATION_LOG_TABLE
-from src.applier import apply_migration
-from utils.utils import resolve_latest_migration
+from utils.utils import (
+    resolve_latest_migration,
+    json_dumps,
+    json_loads,
+    print_table,
+    CACHE_DIR,
+    WRITE_BUFFER_SIZE,
+)
 from src.migration_loader import (
     load_migration_from_file,
+    load_migration_data,
     load_python_migration,
-    load_rename_registry
+    load_rename_registry,
 )
 from utils.constants import _CONFIG_FILE, _INTERNAL_TABLES
 
-load_dotenv()
+if TYPE_CHECKING:
+    from sqlalchemy import MetaData
+    from sqlalchemy.engine import Engine
+
+# DB_URL is the only .env setting read here and an exported value always wins
+# over .env, so only parse .env (and import python-dotenv) when it is missing
+if "DB_URL" not in os.environ:
+    from dotenv import load_dotenv
+    load_dotenv()
 app = typer.Typer()
+logger = logging.getLogger(__name__)
 
 # Configuration file path
 CONFIG_FILE = _CONFIG_FILE
 
+# Migration log INSERT, shared by the YAML and Python apply paths
+_INSERT_MIGRATION_LOG = (
+    f"INSERT INTO {MIGRATION_LOG_TABLE} "
+    f"(version, description, applied_at, payload, dependencies, branch, revision_id) "
+    f"VALUES (:v, :d, :a, :p, :deps, :branch, :rev)"
+)
+
+# Migration log statements used by rollback
+_SELECT_LAST_MIGRATION = (
+    f"SELECT id, version, payload "
+    f"FROM {MIGRATION_LOG_TABLE} "
+    f"ORDER BY id DESC LIMIT 1"
+)
+_DELETE_MIGRATION_LOG = f"DELETE FROM {MIGRATION_LOG_TABLE} WHERE id = :id"
+
+# Last applied migration, used by autogenerate's unchanged-inputs check
+_SELECT_LAST_VERSION = (
+    f"SELECT id, version FROM {MIGRATION_LOG_TABLE} ORDER BY id DESC LIMIT 1"
+)
+
+
+# SQLAlchemy is imported on first use rather than at module import, which
+# keeps it (most of the CLI's startup time) off the path of --help and of
+# commands that never touch the database.
+def text(sql: str):
+    """Lazily imported ``sqlalchemy.text``."""
+    from sqlalchemy import text as sa_text
+    return sa_text(sql)
+
+
+def inspect(subject):
+    """Lazily imported ``sqlalchemy.inspect``."""
+    from sqlalchemy import inspect as sa_inspect
+    return sa_inspect(subject)
+
+
+@functools.lru_cache(maxsize=None)
+def _text(sql: str):
+    """Return a text() construct for a constant SQL string, built once per process."""
+    return text(sql)
+
+def _record_migrations(conn, rows: List[Dict[str, Any]]) -> None:
+    """Insert migration log rows (keys v, d, a, p, deps, branch, rev).
+
+    All rows go through one executemany call, so a command that applies
+    several migrations can record them in a single batch.
+    """
+    if rows:
+        conn.execute(_text(_INSERT_MIGRATION_LOG), rows)
+
+# Environment variables probed (in order) for a database URL after DB_URL
+_DB_URL_ENV_VARS = (
+    "DATABASE_URL",
+    "DB_CONNECTION_STRING",
+    "DATABASE_CONNECTION_STRING",
+    "SQLALCHEMY_DATABASE_URI",
+    "POSTGRES_URL",
+    "MYSQL_URL",
+    "SQLITE_URL",
+)
+
+# Config files probed (in order) for a database URL after the environment
+_CONFIG_FILES = (
+    ".env",
+    "config.py",
+    "settings.py",
+    "database.py",
+    "db_config.py",
+)
+
+# Attribute names looked up in Python config files
+_CONFIG_URL_ATTRS = ("DATABASE_URL", "DB_URL", "database_url", "db_url")
+
+# Models file locations probed (in order) when --models-file is not given
+_MODEL_CANDIDATES = (
+    "models.py",
+    "schema.py",
+    "database.py",
+    "db_models.py",
+    "tables.py",
+    "models/schema.py",
+    "app/models.py",
+    "src/models.py",
+)
+
+# Concurrent connections used to reflect tables on dialects without bulk reflection;
+# src.db._pool_options sizes the CLI pool for these plus the caller's connection
+_REFLECTION_WORKERS = 8
+
+# Snapshot of the environment taken once, after .env has been loaded
+_ENV = dict(os.environ)
+
+
+@functools.lru_cache(maxsize=None)
+def _getenv_cached(name: str) -> Optional[str]:
+    """Look up an environment variable from the import-time snapshot."""
+    return _ENV.get(name)
+
+
+@functools.lru_cache(maxsize=None)
+def _dir_entries(directory: str) -> frozenset:
+    """Return the names present in ``directory``, read with a single scandir."""
+    try:
+        with os.scandir(directory) as it:
+            return frozenset(entry.name for entry in it)
+    except OSError:
+        return frozenset()
+
+
+def _candidate_exists(path: str) -> bool:
+    """Check a relative candidate path against the cached directory listing."""
+    parent, name = os.path.split(path)
+    return name in _dir_entries(parent or ".")
+
 # Global configuration store for programmatic access
 _global_config = {}
 
@@ -88,11 +218,22 @@ def save_database_config(
         "password": password,
         "database": database,
         "db_type": db_type,
-        "saved_at": datetime.datetime.utcnow().isoformat()
     }
     
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(config, f, indent=2)
+    # Nothing to do if the saved configuration already matches
+    existing = load_database_config() or {}
+    if {k: v for k, v in existing.items() if k != "saved_at"} == config:
+        print(f"💾 Database configuration unchanged in {CONFIG_FILE}")
+        return
+    
+    config["saved_at"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    
+    # Write to a temporary file and swap it in so a crash never leaves a partial config
+    tmp_file = CONFIG_FILE + ".tmp"
+    with open(tmp_file, 'w') as f:
+        f.write(json_dumps(config, indent=True))
+    os.replace(tmp_file, CONFIG_FILE)
+    _read_database_config.cache_clear()
     
     print(f"💾 Database configuration saved to {CONFIG_FILE}")
 
@@ -100,9 +241,20 @@ def save_database_config(
 def load_database_config() -> Optional[dict]:
     """Load database configuration from file.
     
+    The parsed file is cached for the rest of the process; writers must call
+    ``_read_database_config.cache_clear()`` after touching the file. Each
+    call returns a fresh copy, so callers may modify the result freely.
+    
     Returns:
         Database configuration dict or None if not found.
     """
+    config = _read_database_config()
+    return copy.deepcopy(config) if config is not None else None
+
+
+@functools.lru_cache(maxsize=None)
+def _read_database_config() -> Optional[dict]:
+    """Parse CONFIG_FILE once; use load_database_config() for a mutable copy."""
     if not os.path.exists(CONFIG_FILE):
         return None
     
@@ -350,7 +502,7 @@ class MigrationGraph:
         return "\n".join(lines)
 
 
-def load_migration_graph(engine: Engine) -> MigrationGraph:
+def load_migration_graph(engine: "Engine") -> MigrationGraph:
     """Load migration graph from database."""
     graph = MigrationGraph()
     
@@ -371,7 +523,7 @@ def load_migration_graph(engine: Engine) -> MigrationGraph:
         
         for row in result:
             version, description, deps_json, branch, revision_id, applied_at, payload = row
-            dependencies = json.loads(deps_json) if deps_json else []
+            dependencies = json_loads(deps_json) if deps_json else []
             
             # Ensure we have valid values
             branch = branch or 'main'
@@ -391,11 +543,16 @@ def load_migration_graph(engine: Engine) -> MigrationGraph:
     return graph
 
 
+def _iter_migration_files(migrations_dir: Path):
+    """Yield the YAML and JSON migration files in ``migrations_dir``."""
+    yield from migrations_dir.glob("*.yml")
+    yield from migrations_dir.glob("*.json")
+
+
 def validate_migration_dependencies(migration_file: str, graph: MigrationGraph) -> List[str]:
     """Validate migration dependencies and detect conflicts."""
     try:
-        with open(migration_file, 'r') as f:
-            data = yaml.safe_load(f)
+        data = load_migration_data(migration_file)
         
         version = data.get('version')
         dependencies = data.get('dependencies', [])
@@ -419,11 +576,14 @@ def validate_migration_dependencies(migration_file: str, graph: MigrationGraph)
 def create_merge_migration(branch1: str, branch2: str, graph: MigrationGraph, 
                           message: str = "Merge branches") -> str:
     """Create a merge migration to combine two branches."""
+    import yaml
+    from src.migration_loader import SafeDumper
+
     merge_base = graph.get_merge_base(branch1, branch2)
     if not merge_base:
         raise ValueError("No common ancestor found between branches")
     
-    version = datetime.datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    version = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%d%H%M%S")
     revision_id = str(uuid.uuid4())[:8]
     
     # Get heads of both branches
@@ -453,12 +613,72 @@ def create_merge_migration(branch1: str, branch2: str, graph: MigrationGraph,
     filename = f"migrations/{version}_merge_{branch1}_{branch2}.yml"
     Path("migrations").mkdir(exist_ok=True)
     
-    with open(filename, 'w') as f:
-        yaml.safe_dump(migration_data, f, default_flow_style=False)
+    with open(filename, "w", buffering=WRITE_BUFFER_SIZE, encoding="utf-8") as f:
+        yaml.dump(migration_data, f, Dumper=SafeDumper, default_flow_style=False, sort_keys=False)
     
     return filename
 
 
+def _read_static_config_url(config_file: str) -> Optional[str]:
+    """Find a database URL assigned as a string literal in a Python config file.
+    
+    The file is parsed, not executed, so import-time side effects never run.
+    The literal is only trusted when executing the file would provably give
+    the same answer: the winning attribute's only bindings are top-level
+    string assignments, and every higher-priority attribute is either unbound
+    or bound only to empty strings.
+    
+    Returns:
+        The URL, or None if the file has to be executed to know it.
+    """
+    import ast
+    
+    with open(config_file, 'r') as f:
+        tree = ast.parse(f.read(), filename=config_file)
+    
+    # Last top-level string literal bound to each attribute
+    found: Dict[str, str] = {}
+    static_targets = set()
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            targets, value = node.targets, node.value
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets, value = [node.target], node.value
+        else:
+            continue
+        if not (isinstance(value, ast.Constant) and isinstance(value.value, str)):
+            continue
+        for target in targets:
+            if isinstance(target, ast.Name) and target.id in _CONFIG_URL_ATTRS:
+                found[target.id] = value.value
+                static_targets.add(id(target))
+    
+    # Any other binding anywhere (computed values, conditionals, loops,
+    # imports, augmented assignment, del, global) makes the attribute dynamic
+    dynamic = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            if node.id in _CONFIG_URL_ATTRS and id(node) not in static_targets:
+                dynamic.add(node.id)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                if alias.name == "*":
+                    dynamic.update(_CONFIG_URL_ATTRS)
+                else:
+                    dynamic.add((alias.asname or alias.name).split(".")[0])
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            dynamic.add(node.name)
+        elif isinstance(node, ast.Global):
+            dynamic.update(node.names)
+    
+    for attr in _CONFIG_URL_ATTRS:
+        if attr in dynamic:
+            return None
+        if found.get(attr):
+            return found[attr]
+    return None
+
+
 def discover_database_url(db_url: Optional[str] = None) -> str:
     """Discover and validate the database URL.
     
@@ -475,62 +695,50 @@ def discover_database_url(db_url: Optional[str] = None) -> str:
         return db_url
     
     # Try environment variables first
-    env_url = os.getenv("DB_URL")
+    env_url = _getenv_cached("DB_URL")
     if env_url:
         return env_url
     
     # Try common environment variable names
-    common_env_vars = [
-        "DATABASE_URL",
-        "DB_CONNECTION_STRING", 
-        "DATABASE_CONNECTION_STRING",
-        "SQLALCHEMY_DATABASE_URI",
-        "POSTGRES_URL",
-        "MYSQL_URL",
-        "SQLITE_URL"
-    ]
-    
-    for env_var in common_env_vars:
-        url = os.getenv(env_var)
+    for env_var in _DB_URL_ENV_VARS:
+        url = _getenv_cached(env_var)
         if url:
             print(f"📁 Using database URL from {env_var}")
             return url
     
     # Try to find database configuration files
-    config_files = [
-        ".env",
-        "config.py",
-        "settings.py", 
-        "database.py",
-        "db_config.py"
-    ]
-    
-    for config_file in config_files:
-        if os.path.exists(config_file):
+    for config_file in _CONFIG_FILES:
+        if _candidate_exists(config_file):
             try:
                 if config_file.endswith('.py'):
-                    # Try to load Python config file
+                    # Prefer a plain string assignment, read without executing the file
+                    url = _read_static_config_url(config_file)
+                    if url:
+                        print(f"📁 Using database URL from {config_file}")
+                        return url
+                    
+                    # Fall back to loading the Python config file
                     import importlib.util
                     spec = importlib.util.spec_from_file_location("config", config_file)
                     config = importlib.util.module_from_spec(spec)
                     spec.loader.exec_module(config)
                     
                     # Look for common database URL attributes
-                    for attr in ['DATABASE_URL', 'DB_URL', 'database_url', 'db_url']:
+                    for attr in _CONFIG_URL_ATTRS:
                         if hasattr(config, attr):
                             url = getattr(config, attr)
                             if url:
                                 print(f"📁 Using database URL from {config_file}")
                                 return url
                 else:
-                    # Try to parse .env file manually
-                    with open(config_file, 'r') as f:
-                        for line in f:
-                            if line.strip().startswith('DB_URL=') or line.strip().startswith('DATABASE_URL='):
-                                url = line.split('=', 1)[1].strip().strip('"\'')
-                                if url:
-                                    print(f"📁 Using database URL from {config_file}")
-                                    return url
+                    # load_dotenv() only searches relative to this package,
+                    # so a .env in the working directory is read here
+                    from dotenv import dotenv_values
+                    values = dotenv_values(config_file)
+                    url = values.get('DB_URL') or values.get('DATABASE_URL')
+                    if url:
+                        print(f"📁 Using database URL from {config_file}")
+                        return url
             except Exception as e:
                 print(f"⚠️ Could not load {config_file}: {e}")
                 continue
@@ -596,22 +804,41 @@ def build_database_url(
 def validate_database_url(db_url: str) -> bool:
     """Validate that the database URL is properly formatted.
     
+    Only the URL syntax is checked; no connection is opened. Connection
+    problems surface from the first real database operation instead.
+    
     Args:
         db_url: Database connection URL to validate.
         
     Returns:
         True if URL is valid, False otherwise.
     """
+    from sqlalchemy.engine.url import make_url
+    from sqlalchemy.exc import ArgumentError
+    
     try:
-        from sqlalchemy import create_engine
-        # Try to create engine to validate URL
-        engine = create_engine(db_url, future=True)
-        # Test connection
-        with engine.connect() as conn:
+        make_url(db_url)
+        return True
+    except ArgumentError as e:
+        print(f"❌ Invalid database URL: {e}")
+        return False
+
+
+def check_database_connection(db_url: str) -> bool:
+    """Check that the database behind the URL accepts connections.
+    
+    Args:
+        db_url: Database connection URL to test.
+        
+    Returns:
+        True if a connection could be opened, False otherwise.
+    """
+    try:
+        with get_engine(db_url).connect() as conn:
             conn.execute(text("SELECT 1"))
         return True
     except Exception as e:
-        print(f"❌ Invalid database URL: {e}")
+        print(f"❌ Database connection failed: {e}")
         return False
 
 
@@ -634,32 +861,78 @@ def discover_models_file(models_file: Optional[str] = None) -> str:
         return models_file
     
     # Auto-discovery: look for common models file names
-    possible_names = [
-        "models.py",
-        "schema.py", 
-        "database.py",
-        "db_models.py",
-        "tables.py",
-        "models/schema.py",
-        "app/models.py",
-        "src/models.py"
-    ]
-    
-    for name in possible_names:
-        if os.path.exists(name):
+    for name in _MODEL_CANDIDATES:
+        if _candidate_exists(name):
             return name
     
     raise FileNotFoundError(
-        "No models file found. Tried: " + ", ".join(possible_names) + 
+        "No models file found. Tried: " + ", ".join(_MODEL_CANDIDATES) + 
         "\nUse --models-file to specify the path to your models file."
     )
 
 
-def load_models_metadata(models_file: str) -> MetaData:
+@contextlib.contextmanager
+def _temporary_sys_path(directory: str):
+    """Put a directory at the front of sys.path for the duration of the block."""
+    sys.path.insert(0, directory)
+    try:
+        yield
+    finally:
+        try:
+            sys.path.remove(directory)
+        except ValueError:
+            pass
+
+
+def _models_cache_file(models_file: str) -> str:
+    """Return the metadata cache path for the current contents of a models file."""
+    import hashlib
+    import sqlalchemy
+    
+    with open(models_file, 'rb') as f:
+        digest = hashlib.sha1(f.read())
+    digest.update(os.path.abspath(models_file).encode())
+    digest.update(sqlalchemy.__version__.encode())
+    return os.path.join(CACHE_DIR, f"models_{digest.hexdigest()}.pkl")
+
+
+def _project_module_files(roots: List[str]) -> List[str]:
+    """Source files of loaded modules that live under ``roots`` (installed packages excluded)."""
+    prefixes = tuple({os.path.abspath(p) + os.sep for p in (sys.prefix, sys.base_prefix, sys.exec_prefix)})
+    files = set()
+    for module in list(sys.modules.values()):
+        path = getattr(module, "__file__", None)
+        if not path:
+            continue
+        path = os.path.abspath(path)
+        if path.startswith(prefixes) or "site-packages" in path or "dist-packages" in path:
+            continue
+        if any(path.startswith(root + os.sep) for root in roots):
+            files.add(path)
+    return sorted(files)
+
+
+def _file_stamps(paths: List[str]) -> List[Tuple[str, int, int]]:
+    """(path, mtime_ns, size) for each path; raises OSError if one is gone."""
+    stamps = []
+    for path in paths:
+        st = os.stat(path)
+        stamps.append((path, st.st_mtime_ns, st.st_size))
+    return stamps
+
+
+def load_models_metadata(models_file: str, use_cache: bool = True) -> "MetaData":
     """Load metadata from the models file.
     
+    The MetaData is pickled to the project cache together with the
+    modification time and size of every project module that was loaded while
+    importing it (the models file and whatever it imports from the project).
+    Later runs reuse the pickle only while all of those files are unchanged.
+    
     Args:
         models_file: Path to the models file.
+        use_cache: If False, ignore any cached entry and import the models
+            (the fresh result still replaces the cache entry).
         
     Returns:
         SQLAlchemy MetaData object.
@@ -667,14 +940,56 @@ def load_models_metadata(models_file: str) -> MetaData:
     Raises:
         ImportError: If the file cannot be imported or lacks metadata.
     """
+    import pickle
+    
+    module_name = os.path.splitext(os.path.basename(models_file))[0]
+    cache_file = None
+    if module_name not in sys.modules:
+        try:
+            cache_file = _models_cache_file(models_file)
+            if use_cache:
+                with open(cache_file, 'rb') as f:
+                    cached = pickle.load(f)
+                if _file_stamps([path for path, _, _ in cached["sources"]]) == cached["sources"]:
+                    return cached["metadata"]
+        except Exception:
+            # No cache entry yet, a stale one, or an unreadable one; import the models instead
+            pass
+    
+    metadata = _import_models_metadata(models_file)
+    
+    if cache_file:
+        try:
+            roots = {os.path.dirname(os.path.abspath(models_file)), os.getcwd()}
+            sources = _file_stamps(_project_module_files(sorted(roots)) + [os.path.abspath(models_file)])
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp_file = cache_file + ".tmp"
+            with open(tmp_file, 'wb') as f:
+                pickle.dump(
+                    {"sources": sorted(set(sources)), "metadata": metadata},
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(tmp_file, cache_file)
+        except Exception:
+            # Models holding unpicklable objects (e.g. callable column defaults) are not cached
+            try:
+                os.remove(cache_file + ".tmp")
+            except OSError:
+                pass
+    return metadata
+
+
+def _import_models_metadata(models_file: str) -> "MetaData":
+    """Import the models file and return its MetaData."""
     try:
-        # Add current directory to Python path
-        import sys
-        sys.path.insert(0, os.path.dirname(os.path.abspath(models_file)))
-        
-        # Import the module
+        # Reuse an already imported models module instead of re-executing it
         module_name = os.path.splitext(os.path.basename(models_file))[0]
-        module = __import__(module_name)
+        if module_name in sys.modules:
+            module = sys.modules[module_name]
+        else:
+            with _temporary_sys_path(os.path.dirname(os.path.abspath(models_file))):
+                module = importlib.import_module(module_name)
         
         # Look for metadata attribute
         if hasattr(module, 'metadata'):
@@ -746,25 +1061,27 @@ def init_db_command(
         
         if not validate_database_url(db_url):
             raise ValueError(f"Invalid database URL: {db_url}")
-        
-        # Save configuration for future use
-        save_database_config(
-            db_url=config.get("db_url"),
-            host=config.get("host"),
-            port=config.get("port"),
-            user=config.get("user"),
-            password=config.get("password"),
-            database=config.get("database"),
-            db_type=config.get("db_type", "sqlite")
-        )
             
         engine = get_engine(db_url)
     except Exception as e:
         print(f"❌ Database configuration error: {e}")
         print("💡 Use --help to see all database connection options")
         raise
+    # Connects to the database; an unreachable or mistyped URL fails here,
+    # before anything is saved for later commands to pick up
     init_metadata(engine)
     print("✅ Migration metadata initialized.")
+    
+    # Save configuration for future use
+    save_database_config(
+        db_url=config.get("db_url"),
+        host=config.get("host"),
+        port=config.get("port"),
+        user=config.get("user"),
+        password=config.get("password"),
+        database=config.get("database"),
+        db_type=config.get("db_type", "sqlite")
+    )
     print("💾 Database configuration saved - future commands will use these settings automatically!")
 
 
@@ -792,21 +1109,26 @@ def revision(file: str = typer.Option(..., help="Path to migration YAML to regis
         $ python main.py revision my_migration.yml
         # Creates: migrations/20250101120000_my_migration.yml
     """
+    import yaml
+    from src.migration_loader import SafeDumper
+
     os.makedirs("migrations", exist_ok=True)
     migration = load_migration_from_file(file)
 
-    timestamp = datetime.datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    timestamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%d%H%M%S")
     out_path = os.path.join(
         "migrations", f"{timestamp}_{os.path.basename(file)}")
 
-    with open(out_path, "w") as f:
-        yaml.safe_dump(
+    with open(out_path, "w", buffering=WRITE_BUFFER_SIZE, encoding="utf-8") as f:
+        yaml.dump(
             {
                 "version": timestamp,
                 "description": migration.description,
                 "changes": [{a.type: a.payload} for a in migration.actions],
             },
             f,
+            Dumper=SafeDumper,
+            sort_keys=False,
         )
 
     print("📦 Revision saved to", out_path)
@@ -837,20 +1159,77 @@ def plan(path: Optional[str] = None, rename_map: str = typer.Option("rename_map.
         $ python main.py plan migrations/20250101120000_add_users.yml
         $ python main.py plan --rename-map custom_renames.yml
     """
+    from src.planner import plan_migration
+
     # Default to latest if no path is given
     if not path:
         path = resolve_latest_migration()
         print(f"📂 Using latest migration: {path}")
-    migration = load_migration_from_file(path)
+    # Rollback metadata is only used by apply, so skip building it
+    migration = load_migration_from_file(path, load_meta=False)
     registry = load_rename_registry(rename_map)
     steps = plan_migration(migration, registry)
 
     print("Planned steps:")
-    print(tabulate(steps, headers="keys"))
+    print_table(steps)
 
 # ---------------------------
 #  APPLY
 # ---------------------------
+def _enhance_drop_column(payload: dict, cols_cache: dict, idx_cache: dict) -> None:
+    """Attach the dropped column's definition to a drop_column payload."""
+    col_meta = cols_cache[payload["table"]].get(payload["column"])
+    if col_meta:
+        payload["meta"] = {
+            "type": str(col_meta["type"]),
+            "nullable": col_meta["nullable"],
+            "default": str(col_meta.get("default")),
+        }
+
+
+def _enhance_drop_index(payload: dict, cols_cache: dict, idx_cache: dict) -> None:
+    """Attach the full index definition to a drop_index payload."""
+    idx_meta = idx_cache[payload["table"]].get(payload["name"])
+    if idx_meta:
+        payload["meta"] = idx_meta
+
+
+def _enhance_drop_table(payload: dict, cols_cache: dict, idx_cache: dict) -> None:
+    """Attach columns and indexes to a drop_table payload for rollback."""
+    tbl = payload["table"]
+    columns = cols_cache[tbl]
+    indexes = list(idx_cache[tbl].values())
+    if not columns:
+        print(f"⚠️ Failed to enhance drop_table metadata for {tbl}")
+        return
+
+    # Enhance column metadata for better rollback
+    enhanced_columns = [
+        {
+            "name": col["name"],
+            "type": str(col["type"]),
+            "nullable": col.get("nullable", True),
+            "primary_key": col.get("primary_key", False),
+            "unique": col.get("unique", False),
+            "default": str(col.get("default")) if col.get("default") is not None else None,
+        }
+        for col in columns.values()
+    ]
+    payload["meta"] = {
+        "columns": enhanced_columns,
+        "indexes": indexes,
+    }
+    print(f"📋 Enhanced drop_table metadata for {tbl}: {len(enhanced_columns)} columns, {len(indexes)} indexes")
+
+
+# Rollback metadata enhancers, keyed by action type
+_ENHANCERS = {
+    "drop_column": _enhance_drop_column,
+    "drop_index": _enhance_drop_index,
+    "drop_table": _enhance_drop_table,
+}
+
+
 
 
 @app.command()
@@ -902,11 +1281,16 @@ def apply(
         $ python main.py apply --dry-run
         $ python main.py apply --db "sqlite:///mydb.db"
     """
+    from src.applier import apply_migration
+
+    # One timestamp for everything this command records
+    applied_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
 
     # Default to latest if no path is given
     if latest or not path:
         path = resolve_latest_migration()
         print(f"📂 Using latest migration: {path}")
+    suffix = Path(path).suffix
 
     try:
         # Get database configuration (uses saved config if no args provided)
@@ -928,153 +1312,51 @@ def apply(
     # -----------------------------
     # YAML Migration
     # -----------------------------
-    if path.endswith((".yml", ".yaml")):
+    if suffix in (".yml", ".yaml", ".json"):
         migration = load_migration_from_file(path)
         registry = load_rename_registry(rename_map)
         inspector = inspect(engine)
 
-        enhanced_actions = []
-        for action in migration.actions:
-            payload = action.payload
-
-            # Enhance drop_column with column metadata
-            if "drop_column" in payload:
-                tbl = payload["drop_column"]["table"]
-                col = payload["drop_column"]["column"]
-                existing_cols = {
-                    c["name"]: c for c in inspector.get_columns(tbl)}
-                if col in existing_cols:
-                    col_meta = existing_cols[col]
-                    payload["drop_column"]["meta"] = {
-                        "type": str(col_meta["type"]),
-                        "nullable": col_meta["nullable"],
-                        "default": str(col_meta.get("default")),
-                    }
-
-            # Enhance drop_index with full index definition
-            if "drop_index" in payload:
-                tbl = payload["drop_index"]["table"]
-                idx = payload["drop_index"]["name"]
-                existing_idx = {
-                    i["name"]: i for i in inspector.get_indexes(tbl)}
-                if idx in existing_idx:
-                    payload["drop_index"]["meta"] = existing_idx[idx]
-
-            # Enhance drop_table with columns + indexes
-            if "drop_table" in payload:
-                tbl = payload["drop_table"]["table"]
-                try:
-                    # Get detailed column information
-                    columns = inspector.get_columns(tbl)
-                    # Get detailed index information
-                    indexes = inspector.get_indexes(tbl)
-                    
-                    # Enhance column metadata for better rollback
-                    enhanced_columns = []
-                    for col in columns:
-                        enhanced_col = {
-                            "name": col["name"],
-                            "type": str(col["type"]),
-                            "nullable": col.get("nullable", True),
-                            "primary_key": col.get("primary_key", False),
-                            "unique": col.get("unique", False),
-                            "default": str(col.get("default")) if col.get("default") is not None else None,
-                        }
-                        enhanced_columns.append(enhanced_col)
-                    
-                    payload["drop_table"]["meta"] = {
-                        "columns": enhanced_columns,
-                        "indexes": indexes,
-                    }
-                    print(f"📋 Enhanced drop_table metadata for {tbl}: {len(enhanced_columns)} columns, {len(indexes)} indexes")
-                except Exception as e:
-                    print(f"⚠️ Failed to enhance drop_table metadata for {tbl}: {e}")
-                    # Fallback to basic metadata
-                payload["drop_table"]["meta"] = {
-                    "columns": inspector.get_columns(tbl),
-                    "indexes": inspector.get_indexes(tbl),
-                }
-
-            enhanced_actions.append(action)
+        # Reflect every table referenced by a drop_* action in one batched
+        # catalog query instead of re-querying the catalog for each table
+        tables_needed = {
+            action.payload["table"]
+            for action in migration.actions
+            if action.type in ("drop_column", "drop_index", "drop_table")
+        }
+        multi_cols: Dict[Tuple[Optional[str], str], List[dict]] = {}
+        multi_idx: Dict[Tuple[Optional[str], str], List[dict]] = {}
+        if tables_needed:
+            try:
+                multi_cols = inspector.get_multi_columns(filter_names=list(tables_needed))
+                multi_idx = inspector.get_multi_indexes(filter_names=list(tables_needed))
+            except Exception as e:
+                print(f"⚠️ Could not inspect tables {', '.join(sorted(tables_needed))}: {e}")
+        cols_cache: Dict[str, Dict[str, dict]] = {
+            tbl: {c["name"]: c for c in multi_cols.get((None, tbl), [])}
+            for tbl in tables_needed
+        }
+        idx_cache: Dict[str, Dict[str, dict]] = {
+            tbl: {i["name"]: i for i in multi_idx.get((None, tbl), [])}
+            for tbl in tables_needed
+        }
 
-        # Replace actions with enriched versions
-        migration.actions = enhanced_actions
+        # Enrich action payloads in place
+        for action in migration.actions:
+            enhancer = _ENHANCERS.get(action.type)
+            if enhancer:
+                enhancer(action.payload, cols_cache, idx_cache)
 
         if dry_run:
             print("📝 Dry-run: would apply migration with enriched metadata")
-            for act in enhanced_actions:
+            for act in migration.actions:
                 print(act.payload)
             return
 
-        # Actually apply migration
-        apply_migration(engine, migration, registry, dry_run=False)
-
         # ✅ Persist enriched payload to migration log for rollback
-        # Store the original YAML structure with enhanced metadata for proper rollback
-        rollback_payload = []
-        for action in enhanced_actions:
-            # Reconstruct the original YAML structure with enhanced metadata
-            if action.type == "drop_column":
-                rollback_payload.append({
-                    "drop_column": {
-                        "table": action.payload["table"],
-                        "column": action.payload["column"],
-                        "meta": action.payload.get("meta", {})
-                    }
-                })
-            elif action.type == "drop_index":
-                rollback_payload.append({
-                    "drop_index": {
-                        "table": action.payload["table"],
-                        "name": action.payload["name"],
-                        "meta": action.payload.get("meta", {})
-                    }
-                })
-            elif action.type == "drop_table":
-                rollback_payload.append({
-                    "drop_table": {
-                        "table": action.payload["table"],
-                        "meta": action.payload.get("meta", {})
-                    }
-                })
-            elif action.type == "rename_table":
-                rollback_payload.append({
-                    "rename_table": {
-                        "from": action.payload["from"],
-                        "to": action.payload["to"]
-                    }
-                })
-            elif action.type == "add_column":
-                rollback_payload.append({
-                    "add_column": {
-                        "table": action.payload["table"],
-                        "column": action.payload["column"],
-                        "type": action.payload["type"],
-                        "meta": action.payload.get("meta", {})
-                    }
-                })
-            elif action.type == "add_index":
-                rollback_payload.append({
-                    "add_index": {
-                        "table": action.payload["table"],
-                        "name": action.payload["name"],
-                        "columns": action.payload["columns"],
-                        "meta": action.payload.get("meta", {})
-                    }
-                })
-            elif action.type == "alter_column":
-                rollback_payload.append({
-                    "alter_column": {
-                        "table": action.payload["table"],
-                        "column": action.payload["column"],
-                        "from": action.payload["from"],
-                        "to": action.payload["to"],
-                        "meta": action.payload.get("meta", {})
-                    }
-                })
-            else:
-                # For other operations, store as-is
-                rollback_payload.append({action.type: action.payload})
+        # Each action payload already carries its enhanced metadata, so the
+        # original YAML structure is serialized straight from the actions
+        rollback_payload = json_dumps([{action.type: action.payload} for action in migration.actions])
 
         # Load migration file to get DAG metadata
         migration_metadata = {
@@ -1084,74 +1366,284 @@ def apply(
         }
         
         try:
-            with open(path, 'r') as f:
-                migration_data = yaml.safe_load(f)
-                migration_metadata = {
-                    'dependencies': migration_data.get('dependencies', []),
-                    'branch': migration_data.get('branch', 'main'),
-                    'revision_id': migration_data.get('revision_id', str(uuid.uuid4())[:8])
-                }
+            migration_data = load_migration_data(path)
+            migration_metadata = {
+                'dependencies': migration_data.get('dependencies', []),
+                'branch': migration_data.get('branch', 'main'),
+                'revision_id': migration_data.get('revision_id', str(uuid.uuid4())[:8])
+            }
         except Exception as e:
             print(f"⚠️ Could not load migration metadata, using defaults: {e}")
 
-        with engine.connect() as conn:
-            conn.execute(
-                text(
-                    f"INSERT INTO {MIGRATION_LOG_TABLE} "
-                    f"(version, description, applied_at, payload, dependencies, branch, revision_id) "
-                    f"VALUES (:v, :d, :a, :p, :deps, :branch, :rev)"
-                ),
+        # Apply the migration and record it in one transaction
+        with engine.begin() as conn:
+            apply_migration(conn, migration, registry, dry_run=False)
+            _record_migrations(conn, [
                 {
                     "v": migration.version,
                     "d": migration.description,
-                    "a": datetime.datetime.utcnow().isoformat(),
-                    "p": json.dumps(rollback_payload),
-                    "deps": json.dumps(migration_metadata['dependencies']),
+                    "a": applied_at,
+                    "p": rollback_payload,
+                    "deps": json_dumps(migration_metadata['dependencies']),
                     "branch": migration_metadata['branch'],
                     "rev": migration_metadata['revision_id']
                 },
-            )
-            conn.commit()
+            ])
+        # Reported only once the transaction has committed
+        print("✅ Migration applied successfully.")
 
     # -----------------------------
     # Python Migration
     # -----------------------------
-    elif path.endswith(".py"):
+    elif suffix == ".py":
         upgrade, _ = load_python_migration(path)
         if dry_run:
             print(f"📝 Dry-run: would run upgrade() from {path}")
         else:
-            with engine.connect() as conn:
-                trans = conn.begin()
-                try:
-                    upgrade(engine)
-                    conn.execute(
-                        text(
-                            f"INSERT INTO {MIGRATION_LOG_TABLE} "
-                            f"(version, description, applied_at, payload) "
-                            f"VALUES (:v, :d, :a, :p)"
-                        ),
+            try:
+                # upgrade() manages its own connections, so the log connection
+                # is only checked out once it has finished
+                upgrade(engine)
+                with engine.begin() as conn:
+                    _record_migrations(conn, [
                         {
                             "v": os.path.basename(path),
                             "d": "Python migration",
-                            "a": datetime.datetime.utcnow().isoformat(),
-                            "p": json.dumps({"type": "python", "file": path}),
+                            "a": applied_at,
+                            "p": json_dumps({"type": "python", "file": path}),
+                            "deps": None,
+                            "branch": None,
+                            "rev": None,
                         },
-                    )
-                    trans.commit()
-                    print("✅ Python migration applied successfully.")
-                except Exception as e:
-                    trans.rollback()
-                    print("❌ Error applying Python migration:", e)
-                    raise
+                    ])
+                print("✅ Python migration applied successfully.")
+            except Exception as e:
+                print("❌ Error applying Python migration:", e)
+                raise
 
     else:
-        raise ValueError("Unsupported migration file type. Use .yml or .py")
+        raise ValueError("Unsupported migration file type. Use .yml, .json or .py")
 
 
 # ---------------------------
 #  ROLLBACK
 # ---------------------------
+@functools.lru_cache(maxsize=None)
+def _raw_type_class():
+    """Build (once) a SQLAlchemy type that renders a recorded type string verbatim."""
+    from sqlalchemy.types import UserDefinedType
+
+    class RawType(UserDefinedType):
+        cache_ok = True
+
+        def __init__(self, spec: str):
+            self.spec = spec
+
+        def get_col_spec(self, **kw):
+            return self.spec
+
+    return RawType
+
+
+def _column_from_meta(name: str, meta: dict, nullable: bool = True):
+    """Turn recorded column metadata into a SQLAlchemy Column."""
+    from sqlalchemy import Column
+
+    default = meta.get("default")
+    return Column(
+        name,
+        _raw_type_class()(meta.get("type") or "VARCHAR(255)"),
+        quote=False,
+        nullable=nullable,
+        primary_key=meta.get("primary_key", False),
+        unique=meta.get("unique", False) or None,
+        # Reflected defaults are already SQL expressions, so render them as-is
+        server_default=text(default) if default not in (None, "None") else None,
+        autoincrement=False,
+    )
+
+
+def _table_stub(tbl: str, columns=()):
+    """A throwaway Table used only to compile DDL for ``tbl``.
+
+    Rollback DDL must name objects exactly as the forward DDL in
+    src.executors did, which is unquoted; quoting mixed-case names here
+    would make PostgreSQL look for "Users" when apply created users. So
+    the stub, its columns and indexes all render their names unquoted.
+    """
+    from sqlalchemy import Column, MetaData, Table
+
+    return Table(tbl, MetaData(), *[
+        c if not isinstance(c, str) else Column(c, quote=False) for c in columns
+    ], quote=False)
+
+
+def _index_on(table, name: str, column_names, unique=False):
+    """Build index ``name`` over plain columns of ``table``, or None if it can't be rebuilt.
+
+    Reflection reports expression (functional) index members as None; such
+    indexes cannot be recreated from the recorded column list.
+    """
+    from sqlalchemy import Index
+
+    if not column_names or not all(isinstance(c, str) and c in table.c for c in column_names):
+        return None
+    return Index(name, *[table.c[c] for c in column_names], unique=bool(unique), quote=False)
+
+
+def _rollback_drop_column(conn, spec: dict) -> None:
+    """Re-add a dropped column using its recorded metadata."""
+    from sqlalchemy.schema import CreateColumn
+
+    tbl = spec["table"]
+    col = spec["column"]
+    meta = spec.get("meta", {})
+    logger.debug("%s %s %s", tbl, col, meta)
+    try:
+        # SQLAlchemy Core has no ALTER TABLE construct; compile the column
+        # definition and write the statement around it, unquoted like apply
+        col_def = CreateColumn(_column_from_meta(col, {"type": meta.get("type")}))
+        col_sql = col_def.compile(dialect=conn.dialect)
+        conn.exec_driver_sql(f"ALTER TABLE {tbl} ADD COLUMN {col_sql}")
+        print(f"↩️ Restored column {col} on {tbl}")
+    except Exception as e:
+        print("⚠️ Rollback column restore failed:", e)
+        raise
+
+
+def _rollback_drop_index(conn, spec: dict) -> None:
+    """Re-create a dropped index from its recorded column list."""
+    from sqlalchemy.schema import CreateIndex
+
+    tbl = spec["table"]
+    idx = spec["name"]
+    meta = spec.get("meta", {})
+    try:
+        cols = meta.get("column_names") or []
+        table = _table_stub(tbl, [c for c in cols if isinstance(c, str)])
+        index = _index_on(table, idx, cols, meta.get("unique"))
+        if index is None:
+            print(f"⚠️ Skipping restore of index {idx} on {tbl}: not a plain column index")
+            return
+        conn.execute(CreateIndex(index))
+        print(f"↩️ Restored index {idx} on {tbl}")
+    except Exception as e:
+        print("⚠️ Rollback index restore failed:", e)
+        raise
+
+
+def _rollback_drop_table(conn, spec: dict) -> None:
+    """Re-create a dropped table with its recorded columns and indexes."""
+    from sqlalchemy.schema import CreateIndex, CreateTable
+
+    tbl = spec["table"]
+    meta = spec.get("meta", {})
+    try:
+        # Recreate table with proper column definitions
+        columns = [
+            _column_from_meta(c["name"], c, nullable=c.get("nullable", True))
+            for c in meta.get("columns", [])
+        ]
+        table = _table_stub(tbl, columns)
+        conn.execute(CreateTable(table))
+
+        # Recreate indexes
+        for idx in meta.get("indexes", []):
+            try:
+                idx_name = idx.get("name")
+                idx_columns = idx.get("column_names", [])
+                if idx_name and idx_columns and idx_name != "PRIMARY":  # Skip primary key index
+                    index = _index_on(table, idx_name, idx_columns, idx.get("unique"))
+                    if index is None:
+                        print(f"⚠️ Skipping index {idx_name} on {tbl}: not a plain column index")
+                        continue
+                    conn.execute(CreateIndex(index))
+            except Exception as idx_e:
+                print(f"⚠️ Failed to recreate index {idx.get('name', 'unknown')}: {idx_e}")
+                raise
+
+        print(f"↩️ Restored table {tbl} with {len(columns)} columns and {len(meta.get('indexes', []))} indexes")
+    except Exception as e:
+        print("⚠️ Rollback table restore failed:", e)
+        raise
+
+
+def _rollback_rename_table(conn, spec: dict) -> None:
+    """Rename a table back to its original name."""
+    try:
+        conn.exec_driver_sql(
+            f"ALTER TABLE {spec['to']} RENAME TO {spec['from']}"
+        )
+        print(f"↩️ Renamed {spec['to']} back to {spec['from']}")
+    except Exception as e:
+        print("⚠️ Rollback rename failed:", e)
+        raise
+
+
+def _rollback_add_column(conn, spec: dict) -> None:
+    """Drop a column that the migration added."""
+    tbl = spec["table"]
+    col = spec["column"]
+    try:
+        conn.exec_driver_sql(f"ALTER TABLE {tbl} DROP COLUMN {col}")
+        print(f"↩️ Dropped column {col} from {tbl}")
+    except Exception as e:
+        print("⚠️ Rollback add_column failed:", e)
+        raise
+
+
+def _rollback_add_index(conn, spec: dict) -> None:
+    """Drop an index that the migration added."""
+    tbl = spec["table"]
+    idx = spec["name"]
+    try:
+        # Only MySQL scopes index names to their table
+        if conn.dialect.name in ("mysql", "mariadb"):
+            conn.exec_driver_sql(f"DROP INDEX {idx} ON {tbl}")
+        else:
+            conn.exec_driver_sql(f"DROP INDEX {idx}")
+        print(f"↩️ Dropped index {idx} from {tbl}")
+    except Exception as e:
+        print("⚠️ Rollback add_index failed:", e)
+        raise
+
+
+def _rollback_alter_column(conn, spec: dict) -> None:
+    """Revert an altered column to its recorded original type."""
+    tbl = spec["table"]
+    col = spec["column"]
+    from_meta = spec["from"]
+    try:
+        # Revert column to original state; the syntax differs per dialect
+        dialect = conn.dialect.name
+        if dialect in ("mysql", "mariadb"):
+            clause = f"MODIFY COLUMN {col} {from_meta['type']}"
+        elif dialect == "postgresql":
+            clause = f"ALTER COLUMN {col} TYPE {from_meta['type']}"
+        else:
+            # apply never executes alter_column either, so there is nothing to undo here;
+            # skip it like an unknown op rather than aborting the whole rollback
+            print(f"⚠️ No rollback available for alter_column on {dialect}; skipping {tbl}.{col}")
+            return
+        conn.exec_driver_sql(f"ALTER TABLE {tbl} {clause}")
+        print(f"↩️ Reverted column {col} in {tbl}")
+    except Exception as e:
+        print("⚠️ Rollback alter_column failed:", e)
+        raise
+
+
+# Reverse-operation handlers, keyed by the action type being undone
+_ROLLBACK_HANDLERS = {
+    "drop_column": _rollback_drop_column,
+    "drop_index": _rollback_drop_index,
+    "drop_table": _rollback_drop_table,
+    "rename_table": _rollback_rename_table,
+    "add_column": _rollback_add_column,
+    "add_index": _rollback_add_index,
+    "alter_column": _rollback_alter_column,
+}
+
+
 @app.command()
 def rollback(
     db: Optional[str] = typer.Option(None, "--db", help="Database connection URL (uses saved config if not provided)"),
@@ -1205,22 +1697,17 @@ def rollback(
         print("💡 Run 'python main.py init-db' first to configure database connection")
         raise
 
-    with engine.connect() as conn:
-        rows = conn.execute(
-            text(
-                f"SELECT id, version, payload "
-                f"FROM {MIGRATION_LOG_TABLE} "
-                f"ORDER BY id DESC LIMIT 1"
-            )
-        ).fetchall()
+    # Reverse operations and the log DELETE commit together, once
+    with engine.begin() as conn:
+        rows = conn.execute(_text(_SELECT_LAST_MIGRATION)).fetchall()
 
         if not rows:
             print("⚠️ No migrations to rollback")
             return
-        print("rows: ", rows)
+        logger.debug("rows: %s", rows)
         row = rows[0]
-        payload = json.loads(row[2])
-        print("payload: ", payload)
+        payload = json_loads(row[2])
+        logger.debug("payload: %s", payload)
         print("Rolling back last migration:", row[1])
 
         if isinstance(payload, dict) and payload.get("type") == "python":
@@ -1230,142 +1717,124 @@ def rollback(
                 downgrade(engine)
         else:
             print("Rolling back raw operations")
-            # Reverse operations
-            for op in reversed(payload):
-                print("1-op: ", op)
-                if "drop_column" in op:
-                    tbl = op["drop_column"]["table"]
-                    col = op["drop_column"]["column"]
-                    meta = op["drop_column"].get("meta", {})
-                    print(tbl, col, meta)
-                    try:
-                        conn.execute(
-                            text(
-                                f"ALTER TABLE {tbl} ADD COLUMN {col} {meta.get('type', 'VARCHAR(255)')}"
-                            )
-                        )                        
-                        print(f"↩️ Restored column {col} on {tbl}")
-                    except Exception as e:
-                        print("⚠️ Rollback column restore failed:", e)
+            # Reverse operations; any failure aborts the whole transaction,
+            # leaving the migration recorded as applied
+            try:
+                for op in reversed(payload):
+                    logger.debug("op: %s", op)
+                    op_type = next(iter(op))
+                    handler = _ROLLBACK_HANDLERS.get(op_type)
+                    if handler:
+                        handler(conn, op[op_type])
+                    else:
+                        print(f"⚠️ No rollback available for {op_type}")
+            except Exception:
+                print(f"❌ Rollback of {row[1]} aborted; migration log left unchanged")
+                raise
+
+        conn.execute(_text(_DELETE_MIGRATION_LOG), {"id": row[0]})
+    # Reported only once the transaction has committed
+    print("✅ Rollback successful.")
 
-                elif "drop_index" in op:
-                    tbl = op["drop_index"]["table"]
-                    idx = op["drop_index"]["name"]
-                    meta = op["drop_index"].get("meta", {})
-                    try:
-                        cols = ", ".join(meta.get("column_names", []))
-                        conn.execute(
-                            text(f"CREATE INDEX {idx} ON {tbl} ({cols})")
-                        )
-                        print(f"↩️ Restored index {idx} on {tbl}")
-                    except Exception as e:
-                        print("⚠️ Rollback index restore failed:", e)
 
-                elif "drop_table" in op:
-                    tbl = op["drop_table"]["table"]
-                    meta = op["drop_table"].get("meta", {})
-                    try:
-                        # Recreate table with proper column definitions
-                        cols_sql = []
-                        for c in meta.get("columns", []):
-                            col_def = f"{c['name']} {c['type']}"
-                            
-                            # Add constraints
-                            if not c.get("nullable", True):
-                                col_def += " NOT NULL"
-                            if c.get("primary_key", False):
-                                col_def += " PRIMARY KEY"
-                            if c.get("unique", False):
-                                col_def += " UNIQUE"
-                            if c.get("default") is not None:
-                                default_val = c.get("default")
-                                if isinstance(default_val, str) and default_val.upper() not in ["NULL", "CURRENT_TIMESTAMP"]:
-                                    col_def += f" DEFAULT '{default_val}'"
-                                elif not isinstance(default_val, str):
-                                    col_def += f" DEFAULT {default_val}"
-                            
-                            cols_sql.append(col_def)
-                        
-                        # Create the table
-                        conn.execute(
-                            text(f"CREATE TABLE {tbl} ({', '.join(cols_sql)})")
-                        )
-                        
-                        # Recreate indexes
-                        for idx in meta.get("indexes", []):
-                            try:
-                                idx_name = idx.get("name")
-                                idx_columns = idx.get("column_names", [])
-                                if idx_name and idx_columns and idx_name != "PRIMARY":  # Skip primary key index
-                                    cols_str = ", ".join(idx_columns)
-                                    conn.execute(
-                                        text(f"CREATE INDEX {idx_name} ON {tbl} ({cols_str})")
-                                    )
-                            except Exception as idx_e:
-                                print(f"⚠️ Failed to recreate index {idx.get('name', 'unknown')}: {idx_e}")
-                        
-                        print(f"↩️ Restored table {tbl} with {len(cols_sql)} columns and {len(meta.get('indexes', []))} indexes")
-                    except Exception as e:
-                        print("⚠️ Rollback table restore failed:", e)
+# ---------------------------
+#  AUTOGENERATE
+# ---------------------------
+def _to_plain(value: Any) -> Any:
+    """Copy reflected metadata into plain dicts/lists that SafeDumper can write.
+    
+    Inspector results may contain tuples (e.g. index column sorting), which
+    the safe YAML dumper rejects. Copying also avoids YAML anchors for
+    objects shared between entries.
+    """
+    if isinstance(value, dict):
+        return {k: _to_plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_plain(v) for v in value]
+    return value
+
+
+def _reflect_tables(engine: "Engine", inspector, tables: List[str]) -> Tuple[dict, dict]:
+    """Reflect columns and indexes for ``tables``, keyed by ``(schema, table)``.
+    
+    Dialects with native multi-table reflection (PostgreSQL, Oracle, MSSQL)
+    answer in one catalog query per kind. For the others SQLAlchemy falls
+    back to one query per table, so those tables are reflected concurrently
+    on separate pooled connections. SQLite is always reflected serially:
+    its catalog reads are local and its connections are not shared across
+    threads.
+    """
+    from sqlalchemy.engine.default import DefaultDialect
+    
+    if not tables:
+        return {}, {}
+    
+    dialect = engine.dialect
+    native_multi = type(dialect).get_multi_columns is not DefaultDialect.get_multi_columns
+    if native_multi or dialect.name == "sqlite" or len(tables) == 1:
+        return (
+            inspector.get_multi_columns(filter_names=tables),
+            inspector.get_multi_indexes(filter_names=tables),
+        )
+    
+    from concurrent.futures import ThreadPoolExecutor
+    
+    def reflect_one(table: str):
+        with engine.connect() as conn:
+            table_inspector = inspect(conn)
+            return table_inspector.get_columns(table), table_inspector.get_indexes(table)
+    
+    with ThreadPoolExecutor(max_workers=min(_REFLECTION_WORKERS, len(tables))) as pool:
+        results = list(pool.map(reflect_one, tables))
+    
+    cols_by_table = {(None, t): cols for t, (cols, _) in zip(tables, results)}
+    idx_by_table = {(None, t): idxs for t, (_, idxs) in zip(tables, results)}
+    return cols_by_table, idx_by_table
 
-                elif "rename_table" in op:
-                    try:
-                        conn.execute(
-                            text(
-                                f"ALTER TABLE {op['to']} RENAME TO {op['from']};"
-                            )
-                        )
-                        print(f"↩️ Renamed {op['to']} back to {op['from']}")
-                    except Exception as e:
-                        print("⚠️ Rollback rename failed:", e)
 
-                elif "add_column" in op:
-                    tbl = op["add_column"]["table"]
-                    col = op["add_column"]["column"]
-                    try:
-                        conn.execute(
-                            text(f"ALTER TABLE {tbl} DROP COLUMN {col}")
-                        )
-                        print(f"↩️ Dropped column {col} from {tbl}")
-                    except Exception as e:
-                        print("⚠️ Rollback add_column failed:", e)
+def _autogenerate_fingerprint(conn, models_path: str, db_url: str, tables: List[str]) -> str:
+    """Hash the inputs that decide autogenerate's result.
+    
+    Covers the models file contents, the database URL, the table list and
+    the last migration_log entry. Column-level changes made outside of
+    migrations are not seen; use --force after those.
+    """
+    import hashlib
+    
+    digest = hashlib.sha256()
+    with open(models_path, 'rb') as f:
+        digest.update(f.read())
+    digest.update(db_url.encode())
+    digest.update("\0".join(sorted(tables)).encode())
+    try:
+        last = conn.execute(_text(_SELECT_LAST_VERSION)).first()
+    except Exception:
+        # No migration log yet
+        conn.rollback()
+        last = None
+    digest.update(repr(tuple(last) if last else None).encode())
+    return digest.hexdigest()
 
-                elif "add_index" in op:
-                    tbl = op["add_index"]["table"]
-                    idx = op["add_index"]["name"]
-                    try:
-                        conn.execute(
-                            text(f"DROP INDEX {idx} ON {tbl}")
-                        )
-                        print(f"↩️ Dropped index {idx} from {tbl}")
-                    except Exception as e:
-                        print("⚠️ Rollback add_index failed:", e)
 
-                elif "alter_column" in op:
-                    tbl = op["alter_column"]["table"]
-                    col = op["alter_column"]["column"]
-                    from_meta = op["alter_column"]["from"]
-                    try:
-                        # Revert column to original state
-                        conn.execute(
-                            text(
-                                f"ALTER TABLE {tbl} MODIFY COLUMN {col} {from_meta['type']}"
-                            )
-                        )
-                        print(f"↩️ Reverted column {col} in {tbl}")
-                    except Exception as e:
-                        print("⚠️ Rollback alter_column failed:", e)
+def _read_autogenerate_fingerprint() -> Optional[str]:
+    """Return the fingerprint stored by the last run that found no changes."""
+    try:
+        with open(os.path.join(CACHE_DIR, "autogen_fp"), 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
 
-        conn.execute(
-            text(f"DELETE FROM {MIGRATION_LOG_TABLE} WHERE id = :id"), {
-                "id": row[0]}
-        )
-        print("✅ Rollback successful.")
+
+def _write_autogenerate_fingerprint(fingerprint: str) -> None:
+    """Store the fingerprint of a run that found no changes."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(os.path.join(CACHE_DIR, "autogen_fp"), 'w') as f:
+            f.write(fingerprint)
+    except OSError as e:
+        print(f"⚠️ Could not write autogenerate cache: {e}")
 
 
-# ---------------------------
-#  AUTOGENERATE
-# ---------------------------
 @app.command()
 def autogenerate(
     db: Optional[str] = typer.Option(None, "--db", help="Database connection URL (uses saved config if not provided)"),
@@ -1378,6 +1847,8 @@ def autogenerate(
     message: str = typer.Option("auto migration", "-m", "--message"),
     models_file: Optional[str] = typer.Option(None, "--models-file", help="Path to models file (auto-discovered if not provided)"),
     branch: str = typer.Option("main", "--branch", help="Branch name for the migration"),
+    file_format: str = typer.Option("yaml", "--format", help="Migration file format: yaml or json"),
+    force: bool = typer.Option(False, "--force", help="Always run the full schema comparison, even if nothing changed since the last clean run"),
 ):
     """Auto-generate migration by comparing database schema with models metadata.
     
@@ -1396,10 +1867,17 @@ def autogenerate(
     
     Generated migrations include enhanced metadata for proper rollback support.
     
+    When a previous run found no changes and neither the models file, the
+    database's table list nor the last applied migration has changed since,
+    the comparison is skipped. Use --force to always compare.
+    
     Args:
         db: Database connection URL. Defaults to DB_URL environment variable.
         message: Description for the generated migration. Defaults to "auto migration".
         models_file: Path to models file. Auto-discovered if not provided.
+        file_format: "yaml" (default) or "json". JSON files load faster but
+            are less pleasant to edit by hand.
+        force: Skip the unchanged-inputs fast path.
         
     Raises:
         FileNotFoundError: If no models file is found.
@@ -1411,7 +1889,14 @@ def autogenerate(
         $ python main.py autogenerate -m "Add user profile table"
         $ python main.py autogenerate --models-file "my_schema.py"
         $ python main.py autogenerate --db "sqlite:///mydb.db" -m "Update schema"
+        $ python main.py autogenerate --format json
     """
+    import yaml
+    from src.migration_loader import SafeDumper
+
+    if file_format not in ("yaml", "json"):
+        raise typer.BadParameter("--format must be 'yaml' or 'json'")
+
     # Discover and load models file
     models_path = discover_models_file(models_file)
     print(f"📁 Using models file: {models_path}")
@@ -1431,24 +1916,38 @@ def autogenerate(
         print(f"❌ Database configuration error: {e}")
         print("💡 Run 'python main.py init-db' first to configure database connection")
         raise
-    inspector = inspect(engine)
-    target_metadata: MetaData = load_models_metadata(models_path)
     diffs = []
-
-    existing_tables = inspector.get_table_names()
-    target_tables = list(target_metadata.tables.keys())
     INTERNAL_TABLES = _INTERNAL_TABLES
 
-    # Tables
+    # Reflect the whole schema over one connection, with one batched call per kind
+    with engine.connect() as conn:
+        inspector = inspect(conn)
+        existing_tables = inspector.get_table_names()
+
+        # Nothing to compare if no input changed since the last clean run
+        fingerprint = _autogenerate_fingerprint(conn, models_path, db_url, existing_tables)
+        if not force and fingerprint == _read_autogenerate_fingerprint():
+            print("✅ No changes detected. Database is up-to-date.")
+            return
+
+        # --force re-imports the models too, not just skips the fingerprint check
+        target_metadata = load_models_metadata(models_path, use_cache=not force)
+        target_tables = list(target_metadata.tables.keys())
+        reflected_tables = [t for t in existing_tables if t not in INTERNAL_TABLES]
+        cols_by_table, idx_by_table = _reflect_tables(engine, inspector, reflected_tables)
+
+    # Tables; set differences (in C) decide membership, the lists keep output order
+    added_tables = set(target_tables).difference(existing_tables, INTERNAL_TABLES)
+    dropped_tables = set(existing_tables).difference(target_tables, INTERNAL_TABLES)
     for table in target_tables:
-        if table not in existing_tables and table not in INTERNAL_TABLES:
+        if table in added_tables:
             diffs.append(
                 {
                     "create_table": {
                         "table": table,
                         "columns": [
                             {
-                                "name": c.name,
+                                "name": str(c.name),
                                 "type": str(c.type),
                                 "nullable": c.nullable,
                                 "primary_key": c.primary_key,
@@ -1460,12 +1959,12 @@ def autogenerate(
                 }
             )
     for table in existing_tables:
-        if table not in target_tables and table not in INTERNAL_TABLES:
-            print("table: ", table)
+        if table in dropped_tables:
+            logger.debug("table: %s", table)
             try:
                 # Capture table metadata from existing database before dropping
-                columns = inspector.get_columns(table)
-                indexes = inspector.get_indexes(table)
+                columns = cols_by_table.get((None, table), [])
+                indexes = idx_by_table.get((None, table), [])
                 
                 # Enhance column metadata for better rollback
                 enhanced_columns = []
@@ -1485,7 +1984,7 @@ def autogenerate(
                         "table": table,
                         "meta": {
                             "columns": enhanced_columns,
-                            "indexes": indexes,
+                            "indexes": _to_plain(indexes),
                         }
                     }
                 })
@@ -1493,33 +1992,48 @@ def autogenerate(
             except Exception as e:
                 print(f"⚠️ Failed to capture metadata for {table}: {e}")
                 # Fallback to basic drop_table without metadata
-            diffs.append({"drop_table": {"table": table}})
+                diffs.append({"drop_table": {"table": table}})
+
+    # Tables present on both sides; columns and indexes are diffed in one pass per table
+    existing_table_set = set(existing_tables)
+    common_tables = [
+        (table, target_metadata.tables[table])
+        for table in target_tables
+        if table in existing_table_set
+    ]
 
-    # Columns
-    for table in target_tables:
-        if table not in existing_tables:
-            continue
-        existing_cols = {col["name"]                         : col for col in inspector.get_columns(table)}
-        target_cols = {
-            col.name: col for col in target_metadata.tables[table].columns}
+    for table, target_table in common_tables:
+        # Columns
+        existing_cols = {col["name"]: col for col in cols_by_table.get((None, table), [])}
+        # Model names are quoted_name (a str subclass SafeDumper rejects), so coerce to str
+        target_cols = {str(col.name): col for col in target_table.columns}
+
+        # Set differences find the changes in C; the dicts are still walked
+        # (only when needed) so diffs keep model/database column order
+        added_cols = target_cols.keys() - existing_cols.keys()
+        dropped_cols = existing_cols.keys() - target_cols.keys()
+
+        # Render each column type once; str() on a type runs the type compiler
+        target_types = {name: str(c.type) for name, c in target_cols.items()}
+        existing_types = {name: str(c["type"]) for name, c in existing_cols.items()}
 
         # Added columns
-        for col in target_cols:
-            if col not in existing_cols:
+        for col in (target_cols if added_cols else ()):
+            if col in added_cols:
                 diffs.append(
                     {
                         "add_column": {
                             "table": table,
                             "column": col,
-                            "type": str(target_cols[col].type),
+                            "type": target_types[col],
                             "nullable": bool(target_cols[col].nullable),
                         }
                     }
                 )
                 
         # Dropped columns (💡 now with meta info)
-        for col in existing_cols:
-            if col not in target_cols:
+        for col in (existing_cols if dropped_cols else ()):
+            if col in dropped_cols:
                 col_meta = existing_cols[col]
                 diffs.append(
                     {
@@ -1527,7 +2041,7 @@ def autogenerate(
                             "table": table,
                             "column": col,
                             "meta": {
-                                "type": str(col_meta["type"]),
+                                "type": existing_types[col],
                                 "nullable": col_meta["nullable"],
                                 "default": str(col_meta.get("default")),
                             },
@@ -1539,34 +2053,32 @@ def autogenerate(
         for col, target_col in target_cols.items():
             if col in existing_cols:
                 existing = existing_cols[col]
-                if str(existing["type"]) != str(target_col.type) or existing["nullable"] != target_col.nullable:
+                if existing_types[col] != target_types[col] or existing["nullable"] != target_col.nullable:
                     diffs.append(
                         {
                             "alter_column": {
                                 "table": table,
                                 "column": col,
-                                "from": {"type": str(existing["type"]), "nullable": bool(existing["nullable"])},
-                                "to": {"type": str(target_col.type), "nullable": bool(target_col.nullable)},
+                                "from": {"type": existing_types[col], "nullable": bool(existing["nullable"])},
+                                "to": {"type": target_types[col], "nullable": bool(target_col.nullable)},
                             }
                         }
                     )
 
-    # Indexes
-    for table in target_tables:
-        if table not in existing_tables:
-            continue
-        existing_indexes = {idx["name"]                            : idx for idx in inspector.get_indexes(table)}
-        target_indexes = {
-            idx.name: idx for idx in target_metadata.tables[table].indexes}
+        # Indexes
+        existing_indexes = {idx["name"]: idx for idx in idx_by_table.get((None, table), [])}
+        target_indexes = {idx.name: idx for idx in target_table.indexes}
+        added_indexes = target_indexes.keys() - existing_indexes.keys()
+        dropped_indexes = existing_indexes.keys() - target_indexes.keys()
 
         # Added indexes
         for idx_name, idx in target_indexes.items():
-            if idx_name not in existing_indexes:
+            if idx_name in added_indexes:
                 diffs.append(
                     {
                         "add_index": {
                             "table": table,
-                            "name": idx_name,
+                            "name": str(idx_name) if idx_name is not None else None,
                             "columns": [str(c.name) for c in idx.columns],
                         }
                     }
@@ -1574,7 +2086,7 @@ def autogenerate(
                 
         # Dropped indexes
         for idx in existing_indexes:
-            if idx not in target_indexes:
+            if idx in dropped_indexes:
                 try:
                     # Capture index metadata from existing database before dropping
                     index_info = existing_indexes[idx]
@@ -1582,21 +2094,23 @@ def autogenerate(
                         "drop_index": {
                             "table": table,
                             "name": idx,
-                            "meta": index_info
+                            "meta": _to_plain(index_info)
                         }
                     })
                     print(f"📋 Captured metadata for index {idx} on {table}")
                 except Exception as e:
                     print(f"⚠️ Failed to capture metadata for index {idx} on {table}: {e}")
                     # Fallback to basic drop_index without metadata
-                diffs.append({"drop_index": {"table": table, "name": idx}})
+                    diffs.append({"drop_index": {"table": table, "name": idx}})
         
     if not diffs:
+        _write_autogenerate_fingerprint(fingerprint)
         print("✅ No changes detected. Database is up-to-date.")
         return
 
-    version = datetime.datetime.utcnow().strftime("%Y%m%d%H%M%S")
-    filename = f"migrations/{version}_{message.replace(' ', '_')}.yml"
+    version = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%d%H%M%S")
+    extension = "json" if file_format == "json" else "yml"
+    filename = f"migrations/{version}_{message.replace(' ', '_')}.{extension}"
     Path("migrations").mkdir(exist_ok=True)
 
     # Create migration with DAG support
@@ -1610,11 +2124,11 @@ def autogenerate(
         'changes': diffs
     }
 
-    safe_diffs = json.loads(json.dumps(diffs))
-    migration_data['changes'] = safe_diffs
-    
-    with open(filename, "w") as f:
-        yaml.safe_dump(migration_data, f, default_flow_style=False)
+    with open(filename, "w", buffering=WRITE_BUFFER_SIZE, encoding="utf-8") as f:
+        if file_format == "json":
+            f.write(json_dumps(migration_data, indent=True))
+        else:
+            yaml.dump(migration_data, f, Dumper=SafeDumper, default_flow_style=False, sort_keys=False)
 
     print(f"📦 New migration written: {filename}")
 
@@ -1695,7 +2209,7 @@ def discover_database(
         
         # Validate the database URL
         if validate_database_url(db_url):
-            print("✅ Database URL is valid and connection successful!")
+            print("✅ Database URL is valid")
             
             # Test basic database operations
             engine = get_engine(db_url)
@@ -1714,7 +2228,7 @@ def discover_database(
                     print("📋 Migration log not yet initialized (run 'python main.py init-db')")
                     
         else:
-            print("❌ Database URL is invalid or connection failed")
+            print("❌ Database URL is invalid")
             
     except Exception as e:
         print(f"❌ Database discovery failed: {e}")
@@ -1756,7 +2270,7 @@ def show_config():
     # Test the configuration
     try:
         db_url = config.get('db_url')
-        if db_url and validate_database_url(db_url):
+        if db_url and check_database_connection(db_url):
             print("✅ Configuration is valid and database is accessible")
         else:
             print("❌ Configuration is invalid or database is not accessible")
@@ -1779,6 +2293,7 @@ def reset_config():
     """
     if os.path.exists(CONFIG_FILE):
         os.remove(CONFIG_FILE)
+        _read_database_config.cache_clear()
         print(f"🗑️  Removed configuration file: {CONFIG_FILE}")
         print("💡 Database configuration reset - tool will use auto-discovery for future commands")
     else:
@@ -1909,6 +2424,9 @@ def create_branch(
         $ python main.py create-branch feature-auth
         $ python main.py create-branch feature-auth --base 20250113000000
     """
+    import yaml
+    from src.migration_loader import SafeDumper
+
     try:
         # Get database configuration
         db_url, config = get_database_config(
@@ -1932,7 +2450,7 @@ def create_branch(
             return
         
         # Create branch migration
-        version = datetime.datetime.utcnow().strftime("%Y%m%d%H%M%S")
+        version = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%d%H%M%S")
         revision_id = str(uuid.uuid4())[:8]
         
         migration_data = {
@@ -1951,8 +2469,8 @@ def create_branch(
         filename = f"migrations/{version}_branch_{branch_name}.yml"
         Path("migrations").mkdir(exist_ok=True)
         
-        with open(filename, 'w') as f:
-            yaml.safe_dump(migration_data, f, default_flow_style=False)
+        with open(filename, "w", buffering=WRITE_BUFFER_SIZE, encoding="utf-8") as f:
+            yaml.dump(migration_data, f, Dumper=SafeDumper, default_flow_style=False, sort_keys=False)
         
         print(f"✅ Created branch '{branch_name}' from {base_version}")
         print(f"📁 Branch migration: {filename}")
@@ -2083,10 +2601,9 @@ def migration_status(
         # Check for migration files in filesystem
         migrations_dir = Path("migrations")
         if migrations_dir.exists():
-            for migration_file in migrations_dir.glob("*.yml"):
+            for migration_file in _iter_migration_files(migrations_dir):
                 try:
-                    with open(migration_file, 'r') as f:
-                        migration_data = yaml.safe_load(f)
+                    migration_data = load_migration_data(str(migration_file))
                     
                     version = migration_data.get('version')
                     if version and version not in graph.nodes:
@@ -2300,10 +2817,9 @@ def status_quick(
         pending_count = 0
         migrations_dir = Path("migrations")
         if migrations_dir.exists():
-            for migration_file in migrations_dir.glob("*.yml"):
+            for migration_file in _iter_migration_files(migrations_dir):
                 try:
-                    with open(migration_file, 'r') as f:
-                        migration_data = yaml.safe_load(f)
+                    migration_data = load_migration_data(str(migration_file))
                     version = migration_data.get('version')
                     if version and version not in graph.nodes:
                         pending_count += 1
@@ -1,5 +1,9 @@
 import os
 import typer
+
+# Tell src.db to size its connection pool for a short-lived CLI process
+os.environ.setdefault("DBMANAGER_CLI", "1")
+
 from commands import app  # Typer app from commands.py
 
 if __name__ == "__main__":
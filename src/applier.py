@@ -1,38 +1,71 @@
-import json, datetime
-from tabulate import tabulate
-from sqlalchemy.engine import Engine
+import datetime
+from itertools import groupby
+from typing import Union
+from contextlib import nullcontext
+from sqlalchemy.engine import Engine, Connection
 from sqlalchemy import text
 from src.planner import plan_migration
-from src.executors import exec_rename_table, exec_split_column, exec_raw_operation
+from src.executors import (
+    COLUMN_OPS,
+    exec_rename_table,
+    exec_split_column,
+    exec_raw_operation,
+    exec_column_batch,
+)
 from src.db import MIGRATION_LOG_TABLE
 from src.migration_loader import Migration
+from utils.utils import json_dumps, print_table
 
-def apply_migration(engine: Engine, migration: Migration, rename_registry: dict, dry_run: bool = False):
+# Built once; used when apply_migration owns the transaction
+_INSERT_LOG = text(
+    f"INSERT INTO {MIGRATION_LOG_TABLE} (version, description, applied_at, payload) VALUES (:v,:d,:a,:p)"
+)
+
+def _column_batch_key(op: dict):
+    """Target table for column ops that may be batched, else None."""
+    if op["op"] == "raw" and op["type"] in COLUMN_OPS:
+        return op["payload"]["table"]
+    return None
+
+def apply_migration(bind: Union[Engine, Connection], migration: Migration, rename_registry: dict, dry_run: bool = False):
+    """Apply a migration through an Engine or inside a caller's Connection.
+
+    When given a Connection, the caller owns the transaction: nothing is
+    committed here, errors propagate so the caller can roll back, and the
+    caller records the migration_log row itself.
+    """
     planned = plan_migration(migration, rename_registry)
     print("Planned operations:")
-    print(tabulate(planned, headers="keys"))
+    print_table(planned)
 
     if dry_run:
         print("Dry-run mode; nothing applied.")
         return
 
-    with engine.connect() as conn:
-        trans = conn.begin()
-        try:
-            for op in planned:
-                if op["op"] == "rename_table":
-                    exec_rename_table(conn, op["from"], op["to"])
-                elif op["op"] == "split_column":
-                    exec_split_column(conn, op["table"], op["column"], op["into"], op.get("transform"))
-                elif op["op"] == "raw":
-                    exec_raw_operation(conn, op)
-            conn.execute(
-                text(f"INSERT INTO {MIGRATION_LOG_TABLE} (version, description, applied_at, payload) VALUES (:v,:d,:a,:p)"),
-                {"v": migration.version, "d": migration.description, "a": datetime.datetime.utcnow().isoformat(), "p": json.dumps(planned)}
-            )
-            trans.commit()
+    owns_transaction = not isinstance(bind, Connection)
+    transaction = bind.begin() if owns_transaction else nullcontext(bind)
+    try:
+        with transaction as conn:
+            # Runs of add/drop_column on the same table become one ALTER TABLE
+            for table, group in groupby(planned, key=_column_batch_key):
+                if table is not None:
+                    exec_column_batch(conn, table, list(group))
+                    continue
+                for op in group:
+                    if op["op"] == "rename_table":
+                        exec_rename_table(conn, op["from"], op["to"])
+                    elif op["op"] == "split_column":
+                        exec_split_column(conn, op["table"], op["column"], op["into"], op.get("transform"))
+                    elif op["op"] == "raw":
+                        exec_raw_operation(conn, op)
+            if owns_transaction:
+                conn.execute(
+                    _INSERT_LOG,
+                    {"v": migration.version, "d": migration.description, "a": datetime.datetime.now(datetime.timezone.utc).isoformat(), "p": json_dumps(planned)}
+                )
+        # With a caller's Connection nothing is committed yet; the caller reports success
+        if owns_transaction:
             print("✅ Migration applied successfully.")
-        except Exception as e:
-            trans.rollback()
-            print("❌ Error applying migration:", e)
-            raise
+    except Exception as e:
+        print("❌ Error applying migration:", e)
+        raise
@@ -1,15 +1,46 @@
 import os
-from sqlalchemy import create_engine, MetaData, Table, Column, Integer, String, Text
-from sqlalchemy.engine import Engine
+from typing import Dict, TYPE_CHECKING
 from utils.constants import _MIGRATION_LOG_TABLE
 
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
 MIGRATION_LOG_TABLE = _MIGRATION_LOG_TABLE
 
-def get_engine(db_url: str) -> Engine:
-    return create_engine(db_url, future=True)
+# Engines are cached per URL so repeated lookups share one connection pool
+_engine_cache: Dict[str, "Engine"] = {}
+
+def _pool_options(db_url: str) -> Dict[str, object]:
+    """Pool settings for the current process type.
+
+    The CLI (main.py sets DBMANAGER_CLI=1) runs a handful of statements and
+    exits, so it keeps one pooled connection and skips pre-ping. Library use
+    is long-lived, so it pings connections on checkout and recycles them
+    every 30 minutes to avoid failing on server-side idle timeouts. SQLite
+    uses its own pool classes and is left at SQLAlchemy's defaults.
+    """
+    if db_url.startswith("sqlite"):
+        return {}
+    if os.environ.get("DBMANAGER_CLI") == "1":
+        # Overflow covers autogenerate's concurrent per-table reflection: its
+        # 8 worker connections (commands._REFLECTION_WORKERS) plus the outer
+        # inspector connection that stays checked out while they run
+        return {"pool_size": 1, "max_overflow": 8, "pool_pre_ping": False}
+    return {"pool_size": 5, "max_overflow": 5, "pool_recycle": 1800, "pool_pre_ping": True}
 
-def init_metadata(engine: Engine):
+def get_engine(db_url: str) -> "Engine":
+    engine = _engine_cache.get(db_url)
+    if engine is None:
+        # Imported here so that loading this module does not pull in SQLAlchemy
+        from sqlalchemy import create_engine
+        engine = create_engine(db_url, future=True, **_pool_options(db_url))
+        _engine_cache[db_url] = engine
+    return engine
+
+def init_metadata(engine: "Engine"):
     """Create migration_log table if not exists."""
+    from sqlalchemy import MetaData, Table, Column, Integer, String, Text
+
     meta = MetaData()
     Table(
         MIGRATION_LOG_TABLE,
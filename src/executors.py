@@ -1,49 +1,104 @@
 from typing import List, Optional, Dict, Any
 from sqlalchemy.engine import Connection
-from sqlalchemy import text
+
+# These statements are DDL built from the migration file and carry no bind
+# parameters, so they go straight to the driver instead of through text()'s
+# per-call parsing for ":name" placeholders.
+
+# Column ops that can share one ALTER TABLE, and the dialects that accept
+# several ADD/DROP COLUMN clauses in a single statement
+COLUMN_OPS = ("add_column", "drop_column")
+_MULTI_ALTER_DIALECTS = ("mysql", "mariadb", "postgresql")
 
 def exec_rename_table(conn: Connection, frm: str, to: str):
-    conn.execute(text(f"ALTER TABLE {frm} RENAME TO {to};"))
+    conn.exec_driver_sql(f"ALTER TABLE {frm} RENAME TO {to};")
 
 def exec_split_column(conn: Connection, table: str, column: str, into: List[str], transform: Optional[str]):
     # prototype split
-    for c in into:
-        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {c} TEXT;"))
+    if conn.dialect.name not in _MULTI_ALTER_DIALECTS:
+        # One ADD COLUMN per ALTER TABLE where the dialect allows no more
+        for c in into:
+            conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {c} TEXT;")
+    elif into:
+        adds = ", ".join(f"ADD COLUMN {c} TEXT" for c in into)
+        conn.exec_driver_sql(f"ALTER TABLE {table} {adds};")
+
+def _raw_create_table(conn: Connection, payload: Dict[str, Any]):
+    table_name = payload["table"]
+    cols = []
+    for col in payload.get("columns", []):
+        col_def = f"{col['name']} {col['type']}"
+        if not col.get("nullable", True):
+            col_def += " NOT NULL"
+        if col.get("primary_key", False):
+            col_def += " PRIMARY KEY"
+        cols.append(col_def)
+    conn.exec_driver_sql(f"CREATE TABLE {table_name} ({', '.join(cols)});")
+
+def _raw_drop_table(conn: Connection, payload: Dict[str, Any]):
+    conn.exec_driver_sql(f"DROP TABLE IF EXISTS {payload['table']};")
+
+def _raw_add_column(conn: Connection, payload: Dict[str, Any]):
+    conn.exec_driver_sql(f"ALTER TABLE {payload['table']} ADD COLUMN {payload['column']} {payload['type']};")
+
+def _raw_drop_column(conn: Connection, payload: Dict[str, Any]):
+    conn.exec_driver_sql(f"ALTER TABLE {payload['table']} DROP COLUMN {payload['column']};")
+
+def _raw_add_index(conn: Connection, payload: Dict[str, Any]):
+    conn.exec_driver_sql(f"CREATE INDEX {payload['name']} ON {payload['table']} ({', '.join(payload['columns'])});")
+
+def _raw_drop_index(conn: Connection, payload: Dict[str, Any]):
+    conn.exec_driver_sql(f"DROP INDEX {payload['name']} ON {payload['table']};")
+
+# Raw operation handlers, keyed by the migration action type
+_RAW_HANDLERS = {
+    "create_table": _raw_create_table,
+    "drop_table": _raw_drop_table,
+    "add_column": _raw_add_column,
+    "drop_column": _raw_drop_column,
+    "add_index": _raw_add_index,
+    "drop_index": _raw_drop_index,
+}
+
+def _column_clause(op_type: str, payload: Dict[str, Any]) -> str:
+    if op_type == "add_column":
+        return f"ADD COLUMN {payload['column']} {payload['type']}"
+    return f"DROP COLUMN {payload['column']}"
+
+def _distinct_column_runs(ops: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Split ``ops`` so no run touches the same column twice.
+
+    Clauses inside one ALTER TABLE have no guaranteed order, so a drop and
+    re-add of one column must stay in separate statements. Names are
+    compared case-insensitively, as MySQL and unquoted PostgreSQL do.
+    """
+    runs, seen = [], set()
+    for op in ops:
+        name = op["payload"]["column"].lower()
+        if not runs or name in seen:
+            runs.append([])
+            seen = set()
+        runs[-1].append(op)
+        seen.add(name)
+    return runs
+
+def exec_column_batch(conn: Connection, table: str, ops: List[Dict[str, Any]]):
+    """Run consecutive add_column/drop_column ops on ``table`` in as few ALTER TABLEs as is safe."""
+    if conn.dialect.name not in _MULTI_ALTER_DIALECTS:
+        for op in ops:
+            exec_raw_operation(conn, op)
+        return
+    for run in _distinct_column_runs(ops):
+        if len(run) == 1:
+            exec_raw_operation(conn, run[0])
+            continue
+        clauses = ", ".join(_column_clause(op["type"], op["payload"]) for op in run)
+        conn.exec_driver_sql(f"ALTER TABLE {table} {clauses};")
 
 def exec_raw_operation(conn: Connection, raw: Dict[str, Any]):
     op_type = raw.get("type")
-    payload = raw.get("payload")
-
-    if op_type == "create_table":
-        table_name = payload["table"]
-        cols = []
-        for col in payload.get("columns", []):
-            col_def = f"{col['name']} {col['type']}"
-            if not col.get("nullable", True):
-                col_def += " NOT NULL"
-            if col.get("primary_key", False):
-                col_def += " PRIMARY KEY"
-            cols.append(col_def)
-        sql = f"CREATE TABLE {table_name} ({', '.join(cols)});"
-        conn.execute(text(sql))
-
-    elif op_type == "drop_table":
-        conn.execute(text(f"DROP TABLE IF EXISTS {payload['table']};"))
-
-    elif op_type == "add_column":
-        sql = f"ALTER TABLE {payload['table']} ADD COLUMN {payload['column']} {payload['type']};"
-        conn.execute(text(sql))
-
-    elif op_type == "drop_column":
-        conn.execute(text(f"ALTER TABLE {payload['table']} DROP COLUMN {payload['column']};"))
-
-    elif op_type == "add_index":
-        sql = f"CREATE INDEX {payload['name']} ON {payload['table']} ({', '.join(payload['columns'])});"
-        conn.execute(text(sql))
-
-    elif op_type == "drop_index":
-        sql = f"DROP INDEX {payload['name']} ON {payload['table']};"
-        conn.execute(text(sql))
-
-    else:
+    handler = _RAW_HANDLERS.get(op_type)
+    if handler is None:
         print("⚠️ Unknown raw operation:", op_type)
+        return
+    handler(conn, raw.get("payload"))
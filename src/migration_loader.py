@@ -1,7 +1,29 @@
+import functools
+import hashlib
 import importlib.util
-import os, yaml, datetime
+import os, datetime
 from dataclasses import dataclass
 from typing import List, Dict, Any
+from utils.utils import CACHE_DIR, json_dumps, json_loads
+
+# PyYAML is imported on first use so that commands which never touch YAML
+# (--help, JSON migrations, cache hits) skip loading it
+@functools.lru_cache(maxsize=None)
+def _yaml_classes():
+    """Return (SafeLoader, SafeDumper), preferring the libyaml-backed C versions."""
+    try:
+        from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+    except ImportError:
+        from yaml import SafeLoader, SafeDumper
+    return SafeLoader, SafeDumper
+
+def __getattr__(name: str):
+    # Keeps "from src.migration_loader import SafeLoader/SafeDumper" working
+    if name == "SafeLoader":
+        return _yaml_classes()[0]
+    if name == "SafeDumper":
+        return _yaml_classes()[1]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 @dataclass
 class MigrationAction:
@@ -14,10 +36,117 @@ class Migration:
     description: str
     actions: List[MigrationAction]
 
-def load_migration_from_file(path: str) -> Migration:
-    with open(path, "r") as f:
-        raw = yaml.safe_load(f)
-    version = str(raw.get("version") or datetime.datetime.utcnow().strftime("%Y%m%d%H%M%S"))
+def _migration_cache_file(path: str) -> str:
+    digest = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()
+    return os.path.join(CACHE_DIR, "migrations", f"{digest}.json")
+
+def _without_meta(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a migration document with the rollback ``meta`` blocks dropped."""
+    changes = [
+        {a_type: {k: v for k, v in payload.items() if k != "meta"} if isinstance(payload, dict) else payload
+         for a_type, payload in change.items()}
+        for change in raw.get("changes") or []
+    ]
+    return {**raw, "changes": changes}
+
+def _compose_without_meta(path: str) -> Dict[str, Any]:
+    """Parse a YAML migration, constructing everything except ``meta`` subtrees.
+
+    The file is composed into a node graph first, and only the nodes that are
+    kept are turned into Python objects, so large reflected ``meta`` blocks
+    are never built.
+    """
+    import yaml
+
+    with open(path, "rb") as f:
+        loader = _yaml_classes()[0](f)
+        try:
+            root = loader.get_single_node()
+            if not isinstance(root, yaml.MappingNode):
+                return loader.construct_document(root) if root is not None else {}
+            # Mappings are walked by hand below, so resolve "<<" merge keys first
+            loader.flatten_mapping(root)
+            raw = {}
+            for key_node, value_node in root.value:
+                key = loader.construct_object(key_node)
+                if key == "changes" and isinstance(value_node, yaml.SequenceNode):
+                    raw[key] = [_construct_change(loader, node) for node in value_node.value]
+                else:
+                    raw[key] = loader.construct_object(value_node, deep=True)
+            return raw
+        finally:
+            loader.dispose()
+
+def _construct_change(loader, node) -> Any:
+    import yaml
+
+    if not isinstance(node, yaml.MappingNode):
+        return loader.construct_object(node, deep=True)
+    loader.flatten_mapping(node)
+    change = {}
+    for type_node, payload_node in node.value:
+        if isinstance(payload_node, yaml.MappingNode):
+            loader.flatten_mapping(payload_node)
+            payload = {}
+            for k_node, v_node in payload_node.value:
+                k = loader.construct_object(k_node)
+                if k != "meta":
+                    payload[k] = loader.construct_object(v_node, deep=True)
+        else:
+            payload = loader.construct_object(payload_node, deep=True)
+        change[loader.construct_object(type_node)] = payload
+    return change
+
+def _load_migration_raw(path: str, load_meta: bool = True) -> Dict[str, Any]:
+    """Parse a migration file, reusing a JSON copy cached for its current mtime and size."""
+    st = os.stat(path)
+    cache_file = _migration_cache_file(path)
+    try:
+        with open(cache_file, "rb") as f:
+            cached = json_loads(f.read())
+        if cached["mtime_ns"] == st.st_mtime_ns and cached["size"] == st.st_size:
+            return cached["raw"] if load_meta else _without_meta(cached["raw"])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    if not load_meta:
+        # Partial documents are not cached; the next full load fills the cache
+        return _compose_without_meta(path)
+
+    import yaml
+
+    # One bytes read; libyaml detects the encoding and decodes in C
+    with open(path, "rb") as f:
+        raw = yaml.load(f.read(), Loader=_yaml_classes()[0])
+
+    # Only cache documents that survive a JSON round-trip unchanged (no dates etc.)
+    try:
+        data = json_dumps({"mtime_ns": st.st_mtime_ns, "size": st.st_size, "raw": raw})
+        if json_loads(data)["raw"] == raw:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            tmp_file = cache_file + ".tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_file, cache_file)
+    except (OSError, TypeError, ValueError):
+        pass
+    return raw
+
+def load_migration_data(path: str, load_meta: bool = True) -> Dict[str, Any]:
+    """Return the raw document of a .json or .yml/.yaml migration file.
+
+    With ``load_meta=False`` the per-action rollback ``meta`` blocks are left
+    out, which is all read-only callers such as ``plan`` need.
+    """
+    if path.endswith(".json"):
+        with open(path, "rb") as f:
+            raw = json_loads(f.read())
+        return raw if load_meta else _without_meta(raw)
+    return _load_migration_raw(path, load_meta)
+
+def load_migration_from_file(path: str, load_meta: bool = True) -> Migration:
+    raw = load_migration_data(path, load_meta)
+    version = str(raw.get("version") or datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%d%H%M%S"))
     desc = raw.get("description", "")
     actions_raw = raw.get("changes", [])
     actions = [MigrationAction(a_type, payload) for d in actions_raw for a_type, payload in d.items()]
@@ -26,9 +155,12 @@ def load_migration_from_file(path: str) -> Migration:
 def load_rename_registry(path: str) -> Dict[str, str]:
     if not os.path.exists(path):
         return {}
-    with open(path, "r") as f:
-        raw = yaml.safe_load(f)
-    return raw.get("table_renames", {})
+    import yaml
+
+    # One bytes read; libyaml detects the encoding and decodes in C
+    with open(path, "rb") as f:
+        raw = yaml.load(f.read(), Loader=_yaml_classes()[0])
+    return (raw or {}).get("table_renames", {})
 
 
 def load_python_migration(path: str):
@@ -1,15 +1,12 @@
 from typing import List, Dict, Any
-from src.migration_loader import Migration
+from src.migration_loader import Migration, MigrationAction
+
+def _plan_action(act: MigrationAction) -> Dict[str, Any]:
+    if act.type == "rename_table":
+        return {"op": "rename_table", "from": act.payload["from"], "to": act.payload["to"]}
+    if act.type == "split_column":
+        return {"op": "split_column", **act.payload}
+    return {"op": "raw", "type": act.type, "payload": act.payload}
 
 def plan_migration(migration: Migration, rename_registry: Dict[str, str]) -> List[Dict[str, Any]]:
-    planned = []
-    for act in migration.actions:
-        if act.type == "rename_table":
-            src = act.payload["from"]
-            dst = act.payload["to"]
-            planned.append({"op": "rename_table", "from": src, "to": dst})
-        elif act.type == "split_column":
-            planned.append({"op": "split_column", **act.payload})
-        else:
-            planned.append({"op": "raw", "type": act.type, "payload": act.payload})
-    return planned
+    return [_plan_action(act) for act in migration.actions]
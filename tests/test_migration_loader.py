@@ -0,0 +1,61 @@
+import textwrap
+
+import pytest
+import yaml
+
+from src.migration_loader import load_migration_data, load_migration_from_file
+
+MERGE_KEY_MIGRATION = textwrap.dedent(
+    """\
+    version: '20250101120000'
+    description: merge keys
+    defaults: &users
+      table: users
+    changes:
+      - add_column:
+          <<: *users
+          column: email
+          type: VARCHAR(255)
+      - drop_column:
+          <<: *users
+          column: legacy
+          meta:
+            type: TEXT
+            nullable: true
+    """
+)
+
+
+@pytest.fixture
+def migration_file(tmp_path, monkeypatch):
+    # The JSON cache lives under the working directory
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "20250101120000_merge_keys.yml"
+    path.write_text(MERGE_KEY_MIGRATION)
+    return str(path)
+
+
+def test_merge_keys_without_meta_on_cold_cache(migration_file):
+    raw = load_migration_data(migration_file, load_meta=False)
+
+    assert raw["changes"] == [
+        {"add_column": {"table": "users", "column": "email", "type": "VARCHAR(255)"}},
+        {"drop_column": {"table": "users", "column": "legacy"}},
+    ]
+    assert raw["defaults"] == {"table": "users"}
+
+
+def test_merge_keys_match_full_load_and_warm_cache(migration_file):
+    cold = load_migration_data(migration_file, load_meta=False)
+    full = load_migration_data(migration_file)  # populates the JSON cache
+    warm = load_migration_data(migration_file, load_meta=False)
+
+    assert full == yaml.safe_load(MERGE_KEY_MIGRATION)
+    assert cold == warm
+
+
+def test_plan_loader_sees_merged_payloads(migration_file):
+    migration = load_migration_from_file(migration_file, load_meta=False)
+
+    assert [a.type for a in migration.actions] == ["add_column", "drop_column"]
+    assert all(a.payload["table"] == "users" for a in migration.actions)
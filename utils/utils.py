@@ -1,15 +1,72 @@
 import os
+import sys
+import json
+
+try:
+    import orjson
+except ImportError:  # optional speedup, see requirements.txt
+    orjson = None
+
+# Project-local directory for derived data that is safe to delete
+CACHE_DIR = ".dbmanager_cache"
+
+# Buffer size for migration file writes; large migrations go out in few syscalls
+WRITE_BUFFER_SIZE = 1 << 20
+
+
+def json_dumps(obj, indent: bool = False) -> str:
+    """Serialize ``obj`` to a JSON string, using orjson when it is installed."""
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(obj, option=option).decode()
+    return json.dumps(obj, indent=2 if indent else None)
+
+
+def json_loads(data):
+    """Parse a JSON string or bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def print_table(rows: list) -> None:
+    """Print a list of dicts as a table.
+
+    Interactive terminals get space-aligned columns under a dashed header
+    rule; when stdout is piped the rows are written as tab-separated values,
+    which skips column-width formatting.
+    """
+    if not rows:
+        return
+    # Union of keys in first-seen order; plan rows don't all share one shape
+    headers = list(dict.fromkeys(k for row in rows for k in row))
+    cells = [[str(row.get(h, "")) for h in headers] for row in rows]
+    if not sys.stdout.isatty():
+        lines = ["\t".join(headers)]
+        lines.extend("\t".join(r) for r in cells)
+        print("\n".join(lines))
+        return
+    widths = [len(h) for h in headers]
+    for r in cells:
+        widths = [max(w, len(c)) for w, c in zip(widths, r)]
+    lines = [
+        "  ".join(h.ljust(w) for h, w in zip(headers, widths)).rstrip(),
+        "  ".join("-" * w for w in widths),
+    ]
+    lines.extend("  ".join(c.ljust(w) for c, w in zip(r, widths)).rstrip() for r in cells)
+    print("\n".join(lines))
 
 
 def resolve_latest_migration() -> str:
     migrations_dir = "migrations"
     if not os.path.exists(migrations_dir):
         raise FileNotFoundError("No migrations directory found.")
-    files = [
-        f for f in os.listdir(migrations_dir)
-        if f.endswith((".yml", ".yaml", ".py"))
-    ]
-    if not files:
+    # Names start with a sortable timestamp, so the latest is simply the max
+    with os.scandir(migrations_dir) as entries:
+        latest = max(
+            (e.name for e in entries if e.name.endswith((".yml", ".yaml", ".json", ".py"))),
+            default=None,
+        )
+    if latest is None:
         raise FileNotFoundError("No migration files found in migrations/ directory.")
-    files.sort()
-    return os.path.join(migrations_dir, files[-1])
\ No newline at end of file
+    return os.path.join(migrations_dir, latest)